@@ -1,12 +1,36 @@
 import cv2
 import numpy as np
-from PIL import Image
 from pytesseract import pytesseract, Output
 
 
-def orc_tesseract(img: np.ndarray, lang: str = "eng") -> dict:
-    """Takes OpenCV image and extracts OCR data from it."""
-    data = pytesseract.image_to_data(img, lang=lang, config="--psm 3", output_type=Output.DICT)
+def orc_tesseract(img: np.ndarray, lang: str = "eng", psm: int = 3) -> dict:
+    """Takes OpenCV image and extracts OCR data from it, pass 1-channel images where possible."""
+    data = pytesseract.image_to_data(img, lang=lang, config=f"--psm {psm}", output_type=Output.DICT)
     return data
 
 
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    """Tesseract works on gray anyway, a 1-channel input is a third of the data to hand over"""
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def ocr_data_to_text(data: dict) -> str:
+    """Rebuilds plain text from orc_tesseract data, one line per tesseract line and blank line between blocks"""
+    lines = []
+    last_block, last_line = None, None
+    for text, block, par, line in zip(data["text"], data["block_num"], data["par_num"], data["line_num"]):
+        if not text.strip():
+            continue
+        if (block, par, line) != last_line:
+            if last_block is not None and block != last_block:
+                lines.append("")
+            lines.append(text)
+            last_block, last_line = block, (block, par, line)
+        else:
+            lines[-1] += " " + text
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def orc_tesseract_text(img: np.ndarray, lang: str = "eng") -> str:
+    """Runs OCR on the whole page in a single tesseract call and returns its plain text"""
+    return ocr_data_to_text(orc_tesseract(_to_gray(img), lang))
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+
+@lru_cache(maxsize=1)
+def cuda_available() -> bool:
+    """Checks once whether OpenCV was built with CUDA and sees a device"""
+    try:
+        return hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:
+        return False
+
+
+def warp_affine_cuda(cv_image: np.ndarray, M: np.ndarray) -> np.ndarray:
+    """Applies the affine matrix on the GPU keeping the image size (cubic, replicated border) like rotate_image"""
+    (h, w) = cv_image.shape[:2]
+    gpu_img = cv2.cuda_GpuMat()
+    gpu_img.upload(cv_image)
+    gpu_out = cv2.cuda.warpAffine(gpu_img, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    return gpu_out.download()
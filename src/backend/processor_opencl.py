@@ -0,0 +1,15 @@
+from functools import lru_cache
+
+import cv2
+
+
+@lru_cache(maxsize=1)
+def opencl_available() -> bool:
+    """Checks once whether OpenCV can run UMat operations on an OpenCL device"""
+    try:
+        if not cv2.ocl.haveOpenCL():
+            return False
+        cv2.ocl.setUseOpenCL(True)
+        return cv2.ocl.useOpenCL()
+    except cv2.error:
+        return False
@@ -1,9 +1,14 @@
+import os
 import sys
 
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
+from PySide6.QtGui import QPixmapCache
+import cv2
 
+from backend import processor
 from ui.main_window import MainWindow
+from utils.worker_manager import Worker
 
 
 if __name__ == '__main__':
@@ -14,6 +19,19 @@ if __name__ == '__main__':
         _qss = f.read()
     app.setStyleSheet(_qss)
 
+    # Background work (OCR) runs on the global thread pool, let it use every core
+    QThreadPool.globalInstance().setMaxThreadCount(os.cpu_count() or 1)
+
+    # Some OpenCV builds default to fewer threads or to the unoptimized code paths
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(os.cpu_count() or 1)
+
+    # Scaled/converted pixmaps are memoized by the viewers, 128 MB keeps a useful number of them
+    QPixmapCache.setCacheLimit(128 * 1024)
+
     window = MainWindow()
     window.showMaximized()
+
+    # Get OpenCV's one-time setup out of the way while the user is still picking an image
+    QThreadPool.globalInstance().start(Worker(processor.warm_up))
     app.exec()
@@ -45,5 +45,11 @@ class MainWindow(QMainWindow):
         self.right_container.setLayout(QHBoxLayout())
         self.right_container.layout().setContentsMargins(0, 0, 0, 0)
 
-        self.right_container.layout().addWidget(EditorContainer(self.image_store, self.ocr_store), 1)
-        self.right_container.layout().addWidget(EditedImageViewer(self.image_store), 2)
+        editor = EditorContainer(self.image_store, self.ocr_store)
+        edited_image_viewer = EditedImageViewer(self.image_store)
+        self.right_container.layout().addWidget(editor, 1)
+        self.right_container.layout().addWidget(edited_image_viewer, 2)
+
+        # Full resolution refinement of the edited image follows what is visible of it
+        editor.viewport_provider = edited_image_viewer.image_viewer.visible_fraction
+        edited_image_viewer.image_viewer.viewChanged.connect(editor.on_view_changed)
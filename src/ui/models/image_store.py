@@ -1,20 +1,39 @@
-from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QImage
+from PySide6.QtCore import QObject, Qt, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+
+def build_mipmaps(img: QImage) -> list[QImage]:
+    """Original followed by successive half-size levels while they stay at least 512 px (safe from worker threads)"""
+    if img.isNull():
+        return []
+    levels = [img]
+    while min(levels[-1].width(), levels[-1].height()) >= 1024:
+        level = levels[-1]
+        levels.append(level.scaled(level.width() // 2, level.height() // 2,
+                                   Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    return levels
 
 
 class ImageStore(QObject):
     imageChanged = Signal(QImage, str)
     editedImageChanged = Signal(QImage)
+    # Sharper version of a region of the edited image, with (x0, y0, x1, y1) fractions of its size
+    editedTileChanged = Signal(QImage, object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._img = QImage()
         self._path = ""
         self._edited_img = QImage()
+        self._mipmaps: list[QImage] = []  # original followed by successive half-size levels, see build_mipmaps
+        self._mip_pixmaps: dict[int, QPixmap] = {}  # levels converted for display so far, by index
 
     # original
-    def set_original_img(self, img: QImage, path: str):
+    def set_original_img(self, img: QImage, path: str, mipmaps: list[QImage] | None = None):
+        """Set the original image, pass its build_mipmaps() levels if they were made off the GUI thread"""
         self._img, self._path = img, path
+        self._mipmaps = build_mipmaps(img) if mipmaps is None else mipmaps
+        self._mip_pixmaps = {}
         self.imageChanged.emit(self._img, self._path)
 
     def get_original_img(self) -> QImage:
@@ -23,6 +42,24 @@ class ImageStore(QObject):
     def get_path(self) -> str:
         return self._path
 
+    def get_original_pixmap(self) -> QPixmap:
+        return self._mip_pixmap(0) if self._mipmaps else QPixmap()
+
+    def best_mip(self, target_w: int, target_h: int) -> QPixmap:
+        """Returns the smallest mipmap level at least target size, so scaling touches as few pixels as possible"""
+        for i in range(len(self._mipmaps) - 1, 0, -1):
+            level = self._mipmaps[i]
+            if level.width() >= target_w and level.height() >= target_h:
+                return self._mip_pixmap(i)
+        return self.get_original_pixmap()
+
+    def _mip_pixmap(self, index: int) -> QPixmap:
+        """Pixmap of a mipmap level, converted the first time it is shown"""
+        pixmap = self._mip_pixmaps.get(index)
+        if pixmap is None:
+            pixmap = self._mip_pixmaps[index] = QPixmap.fromImage(self._mipmaps[index])
+        return pixmap
+
     # editor preview
     def set_edited_img(self, img: QImage):
         self._edited_img = img
@@ -30,3 +67,7 @@ class ImageStore(QObject):
 
     def get_edited_img(self) -> QImage:
         return self._edited_img
+
+    def set_edited_tile(self, img: QImage, fraction: tuple[float, float, float, float]):
+        """Publish a tile over the current edited image, receivers convert it right away (it isn't kept)"""
+        self.editedTileChanged.emit(img, fraction)
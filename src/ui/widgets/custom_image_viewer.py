@@ -1,6 +1,13 @@
-from PySide6.QtGui import QPixmap, Qt, QPainter
+from PySide6.QtGui import QColor, QImage, QPixmap, QPixmapCache, QRegion, Qt, QPainter
 from PySide6.QtWidgets import QFrame, QLabel
-from PySide6.QtCore import QEvent, QPoint, QTimer
+from PySide6.QtCore import QEvent, QPoint, QRect, QRectF, QThreadPool, QTimer, Signal, Slot
+
+from utils.worker_manager import Worker
+
+
+def _smooth_scaled(image: QImage, width: int, height: int, key: tuple) -> tuple[tuple, QImage]:
+    """Smooth scales an image (safe from worker threads, unlike QPixmap)"""
+    return key, image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
 
 
 class ImageViewer(QFrame):
@@ -14,17 +21,44 @@ class ImageViewer(QFrame):
     - Automatic cursor changes (arrow/open hand/closed hand)
     """
     
+    # Visible part of the image changed and settled (zoom, resize or pan ended)
+    viewChanged = Signal()
+    
+    # Smooth scaling of sources larger than this (in pixels) runs on a worker thread
+    ASYNC_SMOOTH_PIXELS = 4_000_000
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setStyleSheet("background-color: grey;")
+        # paintEvent fills every exposed pixel itself (background or image), so Qt neither erases
+        # nor paints a style background first
+        self.background = QColor("grey")
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setAttribute(Qt.WA_NoSystemBackground)
         
         # Image state
         self.original_pixmap = None  # Original full-size image
         self.pixmap = None  # Currently displayed (scaled) pixmap
+        # On-screen size of the image. Equals the pixmap size, except when zoomed in past the
+        # source resolution: then pixmap is the source and paintEvent magnifies the exposed part
+        self._pw = 0
+        self._ph = 0
+        self._pixmap_key = None  # (source cacheKey, width, height) of the displayed pixmap
+        # Optional (pixmap, (x0, y0, x1, y1) fractions of the image) drawn over that part of the
+        # image, e.g. a full resolution version of the visible region. Dropped when the image changes.
+        self._overlay = None
+        # Optional callable (target_w, target_h) -> QPixmap returning a pre-downsampled version of
+        # original_pixmap that is at least target size (e.g. ImageStore.best_mip). With one set,
+        # original_pixmap may be a QImage: only the levels actually shown become pixmaps.
+        self.mip_provider = None
         
         # Pan state
-        self.pan_offset = QPoint(0, 0)
-        self.last_mouse_pos = None
+        # Kept as plain ints, mouse moves shouldn't cross into Qt for the arithmetic
+        self._px = 0
+        self._py = 0
+        self._max_px = 0  # pan limits for the current pixmap/widget size, see _update_pan_limits()
+        self._max_py = 0
+        self._last_x = 0
+        self._last_y = 0
         self.is_panning = False
         
         # Zoom state
@@ -40,10 +74,37 @@ class ImageViewer(QFrame):
             "padding: 5px 10px; border-radius: 3px; font-size: 12px;"
         )
         self.zoom_label.setAlignment(Qt.AlignCenter)
+        self.zoom_label.setFixedWidth(60)  # fits "500%", so text changes never need adjustSize()
         self.zoom_label.hide()
         self.zoom_label.move(10, 10)
         self.zoom_label.raise_()
         
+        # Single timer hiding the zoom indicator, restarted on every zoom change
+        self._zoom_hide_timer = QTimer(self)
+        self._zoom_hide_timer.setSingleShot(True)
+        self._zoom_hide_timer.timeout.connect(self.zoom_label.hide)
+        
+        # Coalesce rescales requested by wheel/resize bursts into at most one per frame (~60 FPS)
+        self._rescale_timer = QTimer(self)
+        self._rescale_timer.setSingleShot(True)
+        self._rescale_timer.setInterval(16)
+        self._rescale_timer.timeout.connect(self._scale_and_display)
+        
+        # Coalesce repaints while panning, high polling rate mice send far more moves than frames
+        self._pan_timer = QTimer(self)
+        self._pan_timer.setSingleShot(True)
+        self._pan_timer.setInterval(16)
+        self._pan_timer.timeout.connect(self.update)
+        
+        # Use fast (nearest neighbour) resampling while zooming/resizing, smooth once it settles
+        self._interacting = False
+        self._pixmap_smooth = False  # displayed pixmap already has final quality, no smooth pass needed
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(150)
+        self._settle_timer.timeout.connect(self._on_interaction_settled)
+        self._smooth_job = None  # _pixmap_key of the smooth scale running in the background, if any
+        
         # Enable mouse tracking for zoom
         self.installEventFilter(self)
     
@@ -51,23 +112,78 @@ class ImageViewer(QFrame):
     # Public methods
     # ========================================================================
     
-    def load_pixmap(self, pixmap: QPixmap):
+    @property
+    def pan_offset(self) -> QPoint:
+        """Offset of the image center from the widget center."""
+        return QPoint(self._px, self._py)
+    
+    @pan_offset.setter
+    def pan_offset(self, offset: QPoint):
+        self._px, self._py = offset.x(), offset.y()
+    
+    def load_pixmap(self, pixmap: QPixmap | QImage):
         """Load a new image and reset zoom/pan."""
         if pixmap is None or pixmap.isNull():
             return
         
         self.original_pixmap = pixmap
+        self._overlay = None
         self.zoom_level = 1.0
-        self.pan_offset = QPoint(0, 0)
+        self._px = self._py = 0
         self._scale_and_display()
         self._update_zoom_indicator()
     
+    def update_pixmap(self, pixmap: QPixmap | QImage):
+        """
+        Swap in a new version of the same image (e.g. live filter preview) keeping zoom/pan.
+
+        Shown with fast resampling right away, re-rendered smoothly once updates stop coming.
+        """
+        if pixmap is None or pixmap.isNull():
+            return
+        if self.original_pixmap is None:
+            self.load_pixmap(pixmap)
+            return
+        
+        self.original_pixmap = pixmap
+        self._overlay = None
+        self._begin_interaction()
+        self._scale_and_display()
+    
+    def set_overlay(self, pixmap: QPixmap, fraction: tuple[float, float, float, float]):
+        """Draw pixmap over the given part of the image (fractions of its size), keeps zoom/pan."""
+        if self.original_pixmap is None or pixmap is None or pixmap.isNull():
+            return
+        self._overlay = (pixmap, fraction)
+        self.update()
+    
+    def visible_fraction(self) -> tuple[float, float, float, float] | None:
+        """Visible part of the image as (x0, y0, x1, y1) fractions of its size, None if all of it is shown."""
+        if self.pixmap is None:
+            return None
+        pw, ph = self._pw, self._ph
+        x = (self.width() - pw) // 2 + self._px
+        y = (self.height() - ph) // 2 + self._py
+        x0, y0 = max(0, -x), max(0, -y)
+        x1, y1 = min(pw, self.width() - x), min(ph, self.height() - y)
+        if x0 == 0 and y0 == 0 and x1 == pw and y1 == ph:
+            return None
+        return x0 / pw, y0 / ph, x1 / pw, y1 / ph
+    
     def clear(self):
         """Clear the displayed image."""
         self.original_pixmap = None
         self.pixmap = None
+        self._pw = self._ph = 0
+        self._pixmap_key = None
+        self._overlay = None
         self.zoom_level = 1.0
-        self.pan_offset = QPoint(0, 0)
+        self._px = self._py = 0
+        self._rescale_timer.stop()
+        self._settle_timer.stop()
+        self._pan_timer.stop()
+        self._interacting = False
+        self._smooth_job = None
         self.update()
     
     # ========================================================================
@@ -75,24 +191,57 @@ class ImageViewer(QFrame):
     # ========================================================================
     
     def paintEvent(self, event):
-        """Custom paint to draw pixmap with pan offset."""
-        super().paintEvent(event)
+        """Custom paint to draw pixmap with pan offset, limited to the exposed area."""
+        painter = QPainter(self)
+        exposed = event.rect()
+        if self.pixmap is None or self.pixmap.isNull():
+            painter.fillRect(exposed, self.background)
+            return
+        
+        # Calculate centered position with pan offset
+        x = (self.width() - self._pw) // 2 + self._px
+        y = (self.height() - self._ph) // 2 + self._py
+        image_rect = QRect(x, y, self._pw, self._ph)
+        
+        # Background only where the image doesn't cover the exposed area
+        if not image_rect.contains(exposed):
+            painter.setClipRegion(QRegion(exposed).subtracted(QRegion(image_rect)))
+            painter.fillRect(exposed, self.background)
+            painter.setClipping(False)
+        
+        target = exposed.intersected(image_rect)
+        if target.isEmpty():
+            return
+        if self._pw == self.pixmap.width() and self._ph == self.pixmap.height():
+            # Pixmap is pre-scaled in _scale_and_display, blit 1:1 just the exposed part of it
+            painter.drawPixmap(target, self.pixmap, target.translated(-x, -y))
+        else:
+            # Magnify only the exposed part of the source
+            sx = self.pixmap.width() / self._pw
+            sy = self.pixmap.height() / self._ph
+            source = QRectF((target.x() - x) * sx, (target.y() - y) * sy, target.width() * sx, target.height() * sy)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, not self._interacting)
+            painter.drawPixmap(QRectF(target), self.pixmap, source)
         
-        if self.pixmap is not None and not self.pixmap.isNull():
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.SmoothPixmapTransform)
-            
-            # Calculate centered position with pan offset
-            x = (self.width() - self.pixmap.width()) // 2 + self.pan_offset.x()
-            y = (self.height() - self.pixmap.height()) // 2 + self.pan_offset.y()
-            
-            painter.drawPixmap(x, y, self.pixmap)
+        if self._overlay is not None:
+            # Scaled into place, only its exposed part gets drawn
+            overlay, (fx0, fy0, fx1, fy1) = self._overlay
+            overlay_rect = QRectF(x + fx0 * self._pw, y + fy0 * self._ph,
+                                  (fx1 - fx0) * self._pw, (fy1 - fy0) * self._ph)
+            painter.setClipRect(target)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, not self._interacting)
+            painter.drawPixmap(overlay_rect, overlay, QRectF(overlay.rect()))
     
     def resizeEvent(self, event):
         """Handle widget resize to rescale the image."""
         super().resizeEvent(event)
+        # Bursts while dragging a window edge are coalesced by the rescale timer, no-op resizes
+        # (e.g. relayouts) are skipped altogether
+        if event.size() == event.oldSize():
+            return
         if self.original_pixmap is not None:
-            self._scale_and_display()
+            self._begin_interaction()
+            self._schedule_rescale()
     
     # ========================================================================
     # Mouse Events - Panning
@@ -102,25 +251,31 @@ class ImageViewer(QFrame):
         """Start panning on left mouse button."""
         if event.button() == Qt.LeftButton and self._is_pannable():
             self.is_panning = True
-            self.last_mouse_pos = event.pos()
+            pos = event.pos()
+            self._last_x, self._last_y = pos.x(), pos.y()
             self.setCursor(Qt.ClosedHandCursor)
         super().mousePressEvent(event)
     
     def mouseMoveEvent(self, event):
         """Pan the image while dragging."""
-        if self.is_panning and self.last_mouse_pos is not None:
-            delta = event.pos() - self.last_mouse_pos
-            self.pan_offset += delta
+        if self.is_panning:
+            pos = event.pos()
+            x, y = pos.x(), pos.y()
+            self._px += x - self._last_x
+            self._py += y - self._last_y
+            self._last_x, self._last_y = x, y
             self._clamp_pan_offset()
-            self.last_mouse_pos = event.pos()
-            self.update()
+            # pan_offset is always current, only the repaint waits for the next frame
+            if not self._pan_timer.isActive():
+                self._pan_timer.start()
         super().mouseMoveEvent(event)
     
     def mouseReleaseEvent(self, event):
         """Stop panning."""
         if event.button() == Qt.LeftButton:
+            if self.is_panning:
+                self.viewChanged.emit()
             self.is_panning = False
-            self.last_mouse_pos = None
             self._update_cursor()
         super().mouseReleaseEvent(event)
     
@@ -154,10 +309,11 @@ class ImageViewer(QFrame):
                 
                 # Only update if zoom changed
                 if self.zoom_level != old_zoom:
+                    self._begin_interaction()
                     if self.zoom_level == 1.0:
                         # Reset to centered when at fit level
-                        self.pan_offset = QPoint(0, 0)
-                        self._scale_and_display()
+                        self._px = self._py = 0
+                        self._schedule_rescale()
                     else:
                         # Zoom towards mouse cursor
                         mouse_pos = event.position().toPoint()
@@ -176,7 +332,7 @@ class ImageViewer(QFrame):
         """Check if image is pannable (larger than widget)."""
         if self.pixmap is None:
             return False
-        return self.pixmap.width() > self.width() or self.pixmap.height() > self.height()
+        return self._pw > self.width() or self._ph > self.height()
     
     def _update_cursor(self):
         """Update cursor based on whether image is pannable."""
@@ -186,46 +342,123 @@ class ImageViewer(QFrame):
             else:
                 self.setCursor(Qt.ArrowCursor)
     
+    def _schedule_rescale(self):
+        """Rescale on the next frame, merging with any rescale already pending."""
+        if not self._rescale_timer.isActive():
+            self._rescale_timer.start()
+    
+    def _begin_interaction(self):
+        """Switch to fast resampling until no zoom/resize happened for a while."""
+        self._interacting = True
+        self._settle_timer.start()
+    
+    def _on_interaction_settled(self):
+        """Re-render the final frame with smooth resampling."""
+        self._interacting = False
+        if self._rescale_timer.isActive() or not self._pixmap_smooth:
+            self._rescale_timer.stop()
+            self._scale_and_display()
+        self.viewChanged.emit()
+    
     def _scale_and_display(self):
         """Scale the original pixmap based on zoom level and display it."""
         if self.original_pixmap is None:
             return
         
-        # Calculate base size (fit to widget)
-        base_size = self.original_pixmap.scaled(
-            self.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        ).size()
+        # Calculate fit-to-widget scale from sizes only (no need to resample the pixmap for it)
+        img_width, img_height = self.original_pixmap.width(), self.original_pixmap.height()
+        fit_scale = min(self.width() / img_width, self.height() / img_height)
         
         # Apply zoom level
-        target_width = int(base_size.width() * self.zoom_level)
-        target_height = int(base_size.height() * self.zoom_level)
+        target_width = max(1, int(img_width * fit_scale * self.zoom_level))
+        target_height = max(1, int(img_height * fit_scale * self.zoom_level))
         
-        # Scale the pixmap
-        self.pixmap = self.original_pixmap.scaled(
-            target_width,
-            target_height,
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
+        key = (self.original_pixmap.cacheKey(), target_width, target_height)
+        if key == self._pixmap_key and (self._pixmap_smooth or self._interacting):
+            # Size change that doesn't change the image size (e.g. the non-limiting dimension),
+            # the displayed pixmap only needs re-centering
+            pass
+        elif (cached := QPixmapCache.find(self._scaled_cache_key(key))) and not cached.isNull():
+            # Smooth rendering of this image at this size made earlier (zoom/filter revisited)
+            self.pixmap = cached
+            self._pw, self._ph = cached.width(), cached.height()
+            self._pixmap_smooth = True
+        elif target_width > img_width or target_height > img_height:
+            # Zoomed in past the source resolution: an upscaled copy would be up to max_zoom^2 times
+            # the source, paintEvent magnifies just the visible part instead (smoothly once settled)
+            self.pixmap = self.original_pixmap
+            if self.mip_provider is not None:
+                self.pixmap = self.mip_provider(img_width, img_height)
+            self._pw, self._ph = target_width, target_height
+            self._pixmap_smooth = not self._interacting
+        else:
+            # Scale from the smallest available level (cheap nearest neighbour for intermediate frames)
+            source = self.original_pixmap
+            if self.mip_provider is not None:
+                source = self.mip_provider(target_width, target_height)
+            mode = Qt.FastTransformation if self._interacting else Qt.SmoothTransformation
+            if mode == Qt.SmoothTransformation and source.width() * source.height() > self.ASYNC_SMOOTH_PIXELS:
+                # Large smooth scales would stall the UI thread, show a fast one until the
+                # worker delivers (see _on_smooth_scaled)
+                self._start_smooth_scale(source, key)
+                mode = Qt.FastTransformation
+            if key != self._pixmap_key or mode == Qt.SmoothTransformation:
+                self.pixmap = source.scaled(
+                    target_width,
+                    target_height,
+                    Qt.KeepAspectRatio,
+                    mode
+                )
+                self._pw, self._ph = self.pixmap.width(), self.pixmap.height()
+                # Fast mode only differs from smooth when pixels actually get resampled
+                self._pixmap_smooth = mode == Qt.SmoothTransformation or source.size() == self.pixmap.size()
+                if self._pixmap_smooth:
+                    QPixmapCache.insert(self._scaled_cache_key(key), self.pixmap)
+        self._pixmap_key = key
         
         # Clamp pan offset and update cursor
+        self._update_pan_limits()
         self._clamp_pan_offset()
         self._update_cursor()
         self.update()
     
+    def _start_smooth_scale(self, source: QPixmap, key: tuple):
+        """Smooth scale source to the size in key on a worker thread, unless that is already running."""
+        if key == self._smooth_job:
+            return
+        self._smooth_job = key
+        worker = Worker(_smooth_scaled, source.toImage(), key[1], key[2], key)
+        worker.signals.result.connect(self._on_smooth_scaled)
+        QThreadPool.globalInstance().start(worker)
+    
+    @Slot(object)
+    def _on_smooth_scaled(self, result: tuple[tuple, QImage]):
+        """Swap in a background smooth scale, if it still matches what is displayed."""
+        key, image = result
+        if key == self._smooth_job:
+            self._smooth_job = None
+        # Stale results (image, zoom or size changed meanwhile) are dropped
+        if key != self._pixmap_key or self._pixmap_smooth or self.original_pixmap is None:
+            return
+        self.pixmap = QPixmap.fromImage(image)
+        self._pw, self._ph = self.pixmap.width(), self.pixmap.height()
+        self._pixmap_smooth = True
+        QPixmapCache.insert(self._scaled_cache_key(key), self.pixmap)
+        self.update()
+    
+    @staticmethod
+    def _scaled_cache_key(key: tuple) -> str:
+        """QPixmapCache key of a smooth scaled version of a source pixmap"""
+        return "viewer_scaled_{}_{}x{}".format(*key)
+    
     def _zoom_at_point(self, mouse_pos: QPoint, old_zoom: float):
         """Zoom towards a specific point (mouse cursor position)."""
         # Calculate mouse position relative to image center before zoom
         old_center_x = self.width() / 2
         old_center_y = self.height() / 2
         
-        rel_x = mouse_pos.x() - old_center_x - self.pan_offset.x()
-        rel_y = mouse_pos.y() - old_center_y - self.pan_offset.y()
-        
-        # Scale the image
-        self._scale_and_display()
+        rel_x = mouse_pos.x() - old_center_x - self._px
+        rel_y = mouse_pos.y() - old_center_y - self._py
         
         # Calculate new position to keep the same point under cursor
         zoom_ratio = self.zoom_level / old_zoom
@@ -233,47 +466,31 @@ class ImageViewer(QFrame):
         new_rel_y = rel_y * zoom_ratio
         
         # Adjust pan offset
-        self.pan_offset.setX(int(self.pan_offset.x() + (rel_x - new_rel_x)))
-        self.pan_offset.setY(int(self.pan_offset.y() + (rel_y - new_rel_y)))
+        self._px = int(self._px + (rel_x - new_rel_x))
+        self._py = int(self._py + (rel_y - new_rel_y))
         
-        # Clamp and update
-        self._clamp_pan_offset()
-        self.update()
+        # Scale the image (clamps pan offset against the new size and repaints)
+        self._schedule_rescale()
     
-    def _clamp_pan_offset(self):
-        """Limit panning to prevent empty space."""
+    def _update_pan_limits(self):
+        """Recompute how far the image may be panned, after the pixmap or widget size changed."""
         if self.pixmap is None:
+            self._max_px = self._max_py = 0
             return
-        
-        # If image fits entirely, center it
-        if self.pixmap.width() <= self.width() and self.pixmap.height() <= self.height():
-            self.pan_offset = QPoint(0, 0)
-            return
-        
-        # Calculate excess in each dimension
-        excess_x = self.pixmap.width() - self.width()
-        excess_y = self.pixmap.height() - self.height()
-        
-        # Clamp X
-        if excess_x > 0:
-            max_offset_x = excess_x // 2
-            self.pan_offset.setX(max(-max_offset_x, min(max_offset_x, self.pan_offset.x())))
-        else:
-            self.pan_offset.setX(0)
-        
-        # Clamp Y
-        if excess_y > 0:
-            max_offset_y = excess_y // 2
-            self.pan_offset.setY(max(-max_offset_y, min(max_offset_y, self.pan_offset.y())))
-        else:
-            self.pan_offset.setY(0)
+        # Half of the excess in each dimension, 0 (centered) where the image fits
+        self._max_px = max(0, (self._pw - self.width()) // 2)
+        self._max_py = max(0, (self._ph - self.height()) // 2)
+    
+    def _clamp_pan_offset(self):
+        """Limit panning to prevent empty space."""
+        self._px = max(-self._max_px, min(self._max_px, self._px))
+        self._py = max(-self._max_py, min(self._max_py, self._py))
     
     def _update_zoom_indicator(self):
         """Update the zoom level indicator overlay."""
         zoom_percent = int(self.zoom_level * 100)
         self.zoom_label.setText(f"{zoom_percent}%")
-        self.zoom_label.adjustSize()
         self.zoom_label.show()
         
-        # Auto-hide after 5 seconds
-        QTimer.singleShot(5000, self.zoom_label.hide)
+        # Auto-hide 5 seconds after the last change
+        self._zoom_hide_timer.start(5000)
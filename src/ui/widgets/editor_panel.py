@@ -1,15 +1,16 @@
+from collections import OrderedDict
+from typing import Iterator
+
 import numpy as np
-from PySide6.QtCore import Qt, Signal, Slot, QThreadPool, QRunnable
+from PySide6.QtCore import Qt, Signal, Slot, QThreadPool, QRunnable, QTimer
 from PySide6.QtGui import QImage
 from PySide6.QtWidgets import (QFrame, QHBoxLayout, QVBoxLayout, QCheckBox, QSpacerItem, QSizePolicy, QLabel, QSlider,
                                QSpinBox, QPushButton, QErrorMessage, QApplication, QRadioButton, QButtonGroup)
 
 from backend import processor
-from backend.ocr_engine import orc_tesseract
-from backend.processor import dilate, erode
 from ui.models.image_store import ImageStore
 from ui.models.ocr_store import OCRStore
-from utils.image_convert import qimage_to_cv, cv_to_qimage
+from utils.image_convert import qimage_to_cv, ndarray_to_qimage
 from utils.worker_manager import Worker
 
 
@@ -22,20 +23,35 @@ class BaseFilterWidget(QFrame):
 
     def __init__(self):
         super().__init__()
-
-    def get_params(self) -> dict:
-        """Return current filter parameters"""
-        raise NotImplementedError
+        # Widget state mirrored into plain attributes by the widgets' slots, so building the pipeline
+        # doesn't query Qt
+        self._enabled = False
 
     def reset(self):
         """Reset to default values"""
         raise NotImplementedError
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        """Apply this filter to the image"""
+    def is_enabled(self) -> bool:
+        """Fast check whether the filter is on, without building its op"""
+        return self._enabled
+
+    def get_op(self) -> tuple[str, dict] | None:
+        """Return this filter as a processor.Pipeline operation (only asked for when enabled), None if it's a no-op"""
         raise NotImplementedError
 
 
+class OddSpinBox(QSpinBox):
+    """Spin box for kernel sizes, typed even values are rounded up to the next odd one"""
+
+    def __init__(self):
+        super().__init__()
+        self.setSingleStep(2)
+
+    def valueFromText(self, text: str) -> int:
+        value = super().valueFromText(text)
+        return value if value % 2 else min(value + 1, self.maximum())
+
+
 # ============================================================================
 # Individual Filter Widgets
 # ============================================================================
@@ -44,28 +60,24 @@ class GrayscaleFilterWidget(BaseFilterWidget):
 
     def __init__(self):
         super().__init__()
-        self.setLayout(QHBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("To Grey")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         self.checkbox.toggled.connect(self._on_toggled)
 
     @Slot(bool)
-    def _on_toggled(self):
+    def _on_toggled(self, checked: bool):
+        self._enabled = checked
         self.paramsChanged.emit()
 
-    def get_params(self) -> dict:
-        return {"enabled": self.checkbox.isChecked()}
-
     def reset(self):
         self.checkbox.setChecked(False)
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        if self.get_params()["enabled"]:
-            return processor.to_gray(img)
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        return "gray", {}
 
 
 class BinaryFilterWidget(BaseFilterWidget):
@@ -73,66 +85,75 @@ class BinaryFilterWidget(BaseFilterWidget):
 
     def __init__(self):
         super().__init__()
-        self.setLayout(QVBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("Binary")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         # Threshold slider container
         slider_cont = QFrame()
-        slider_cont.setLayout(QHBoxLayout())
-        slider_cont.layout().setContentsMargins(10, 0, 0, 0)  # Indent
+        slider_layout = QHBoxLayout(slider_cont)
+        slider_layout.setContentsMargins(10, 0, 0, 0)  # Indent
 
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setMinimumWidth(50)
         self.slider.setMinimum(0)
-        self.slider.setMaximum(255)
-        self.slider.setValue(127)
+        # Threshold moves in steps of 4 (see _quantize), so the range ends on one and keys step by it
+        self.slider.setMaximum(252)
+        self.slider.setSingleStep(4)
+        self.slider.setPageStep(16)
+        self.slider.setValue(128)
         self.slider.setEnabled(False)
+        # While dragging, value only commits on release (valueChanged), intermediate positions come
+        # from sliderMoved and are coalesced by the container's debounce
+        self.slider.setTracking(False)
+        self._threshold = self._quantize(self.slider.value())
 
-        self.threshold_label = QLabel("127")
+        self.threshold_label = QLabel(str(self._threshold))
         self.threshold_label.setMinimumWidth(30)
 
-        slider_cont.layout().addWidget(QLabel("Threshold:"))
-        slider_cont.layout().addWidget(self.slider)
-        slider_cont.layout().addWidget(self.threshold_label)
+        slider_layout.addWidget(QLabel("Threshold:"))
+        slider_layout.addWidget(self.slider)
+        slider_layout.addWidget(self.threshold_label)
 
-        self.layout().addWidget(slider_cont)
+        layout.addWidget(slider_cont)
 
         # Connect signals
         self.checkbox.toggled.connect(self._on_checkbox_toggled)
         self.slider.valueChanged.connect(self._on_slider_changed)
+        self.slider.sliderMoved.connect(self._on_slider_changed)
 
     @Slot(bool)
     def _on_checkbox_toggled(self, checked: bool):
+        self._enabled = checked
         self.slider.setEnabled(checked)
         self.paramsChanged.emit()
 
     @Slot(int)
     def _on_slider_changed(self, value: int):
-        self.threshold_label.setText(str(value))
-        if self.checkbox.isChecked():
+        # value is the handle position for both valueChanged and sliderMoved, the label shows the
+        # quantized threshold that is actually applied
+        threshold = self._quantize(value)
+        if threshold == self._threshold:
+            return  # same quantized threshold, nothing to redo
+        self._threshold = threshold
+        self.threshold_label.setText(str(threshold))
+        if self._enabled:
             self.paramsChanged.emit()
 
-    def get_params(self) -> dict:
-        return {
-            "enabled": self.checkbox.isChecked(),
-            "threshold": self.slider.value()
-        }
+    @staticmethod
+    def _quantize(value: int) -> int:
+        """Nearest threshold in steps of 4, so sweeping back and forth hits the preview caches"""
+        return (value + 2) & ~3
 
     def reset(self):
         self.checkbox.setChecked(False)
-        self.slider.setValue(127)
+        self.slider.setValue(128)
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        params = self.get_params()
-        if params["enabled"]:
-            # Ensure image is grayscale before binarization
-            if len(img.shape) == 3:
-                img = processor.to_gray(img)
-            return processor.to_binary(img, params["threshold"], 255)
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        # Pipeline converts to grayscale before binarization if needed
+        return "threshold", {"threshold": self._threshold, "max_value": 255}
 
 
 class InvertFilterWidget(BaseFilterWidget):
@@ -140,28 +161,24 @@ class InvertFilterWidget(BaseFilterWidget):
 
     def __init__(self):
         super().__init__()
-        self.setLayout(QHBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("Invert")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         self.checkbox.toggled.connect(self._on_toggled)
 
     @Slot(bool)
-    def _on_toggled(self):
+    def _on_toggled(self, checked: bool):
+        self._enabled = checked
         self.paramsChanged.emit()
 
-    def get_params(self) -> dict:
-        return {"enabled": self.checkbox.isChecked()}
-
     def reset(self):
         self.checkbox.setChecked(False)
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        if self.get_params()["enabled"]:
-            return processor.invert(img)
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        return "invert", {}
 
 
 class GaussianFilterWidget(BaseFilterWidget):
@@ -169,35 +186,35 @@ class GaussianFilterWidget(BaseFilterWidget):
 
     def __init__(self):
         super().__init__()
-        self.setLayout(QVBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("Gaussian blur")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         self.ksize_cont = QFrame()
-        self.ksize_cont.setLayout(QHBoxLayout())
-        self.ksize_cont.layout().setContentsMargins(10, 0, 0, 0)
-        self.layout().addWidget(self.ksize_cont)
+        ksize_layout = QHBoxLayout(self.ksize_cont)
+        ksize_layout.setContentsMargins(10, 0, 0, 0)
+        layout.addWidget(self.ksize_cont)
 
         self.ksize_label = QLabel("Ksize:")
-        self.ksize_cont.layout().addWidget(self.ksize_label)
+        ksize_layout.addWidget(self.ksize_label)
 
-        self.ksize_spinbox_1 = QSpinBox()
+        self.ksize_spinbox_1 = OddSpinBox()
         self.ksize_spinbox_1.setMinimum(1)
         self.ksize_spinbox_1.setMaximum(39)
         self.ksize_spinbox_1.setValue(3)
-        self.ksize_spinbox_1.setSingleStep(2)
         self.ksize_spinbox_1.setEnabled(False)
-        self.ksize_cont.layout().addWidget(self.ksize_spinbox_1)
+        ksize_layout.addWidget(self.ksize_spinbox_1)
 
-        self.ksize_spinbox_2 = QSpinBox()
+        self.ksize_spinbox_2 = OddSpinBox()
         self.ksize_spinbox_2.setMinimum(1)
         self.ksize_spinbox_2.setMaximum(39)
         self.ksize_spinbox_2.setValue(3)
-        self.ksize_spinbox_2.setSingleStep(2)
         self.ksize_spinbox_2.setEnabled(False)
-        self.ksize_cont.layout().addWidget(self.ksize_spinbox_2)
+        ksize_layout.addWidget(self.ksize_spinbox_2)
+
+        self._ksize = (self.ksize_spinbox_1.value(), self.ksize_spinbox_2.value())
 
         self.checkbox.toggled.connect(self._on_checkbox_toggled)
         self.ksize_spinbox_1.valueChanged.connect(self._on_ksize_changed)
@@ -205,146 +222,147 @@ class GaussianFilterWidget(BaseFilterWidget):
 
     @Slot(bool)
     def _on_checkbox_toggled(self, checked: bool):
+        self._enabled = checked
         self.ksize_spinbox_1.setEnabled(checked)
         self.ksize_spinbox_2.setEnabled(checked)
         self.paramsChanged.emit()
 
     @Slot()
     def _on_ksize_changed(self):
-        if self.checkbox.isChecked():
+        self._ksize = (self.ksize_spinbox_1.value(), self.ksize_spinbox_2.value())
+        if self._enabled:
             self.paramsChanged.emit()
 
-    def get_params(self) -> dict:
-        return {"enabled": self.checkbox.isChecked(),
-                "k_tuple": (self.ksize_spinbox_1.value(), self.ksize_spinbox_2.value())}
-
     def reset(self):
         self.checkbox.setChecked(False)
         self.ksize_spinbox_1.setValue(3)
         self.ksize_spinbox_2.setValue(3)
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        params = self.get_params()
-        if params["enabled"]:
-            return processor.gaussian_blur(img, params["k_tuple"])
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        if self._ksize == (1, 1):
+            return None  # 1x1 kernel leaves the image as is
+        return "gaussian", {"kernel_size": self._ksize}
 
 
 class MedianFilterWidget(BaseFilterWidget):
     def __init__(self):
         super().__init__()
 
-        self.setLayout(QVBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("Median blur")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         self.ksize_cont = QFrame()
-        self.ksize_cont.setLayout(QHBoxLayout())
-        self.ksize_cont.layout().setContentsMargins(10, 0, 0, 0)
-        self.layout().addWidget(self.ksize_cont)
+        ksize_layout = QHBoxLayout(self.ksize_cont)
+        ksize_layout.setContentsMargins(10, 0, 0, 0)
+        layout.addWidget(self.ksize_cont)
 
         self.ksize_label = QLabel("Ksize:")
-        self.ksize_cont.layout().addWidget(self.ksize_label)
+        ksize_layout.addWidget(self.ksize_label)
 
-        self.ksize_spinbox = QSpinBox()
+        self.ksize_spinbox = OddSpinBox()
         self.ksize_spinbox.setMinimum(1)
         self.ksize_spinbox.setMaximum(39)
         self.ksize_spinbox.setValue(3)
-        self.ksize_spinbox.setSingleStep(2)
         self.ksize_spinbox.setEnabled(False)
-        self.ksize_cont.layout().addWidget(self.ksize_spinbox)
+        ksize_layout.addWidget(self.ksize_spinbox)
+
+        self._ksize = self.ksize_spinbox.value()
 
         self.checkbox.toggled.connect(self._on_checkbox_toggled)
         self.ksize_spinbox.valueChanged.connect(self._on_ksize_changed)
 
     @Slot(bool)
     def _on_checkbox_toggled(self, checked: bool):
+        self._enabled = checked
         self.ksize_spinbox.setEnabled(checked)
         self.paramsChanged.emit()
 
-    @Slot()
-    def _on_ksize_changed(self):
+    @Slot(int)
+    def _on_ksize_changed(self, value: int):
+        self._ksize = value
         self.paramsChanged.emit()
 
-    def get_params(self) -> dict:
-        return {"enabled": self.checkbox.isChecked(),
-                "ksize": self.ksize_spinbox.value()}
-
     def reset(self):
         self.checkbox.setChecked(False)
         self.ksize_spinbox.setValue(3)
 
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        params = self.get_params()
-        if params["enabled"]:
-            return processor.median_blur(img, params["ksize"])
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        if self._ksize == 1:
+            return None  # median of a single pixel is the pixel
+        return "median", {"kernel_size": self._ksize}
 
 
 class DilationErosionFilterWidget(BaseFilterWidget):
     def __init__(self):
         super().__init__()
-        self.setLayout(QVBoxLayout())
-        self.layout().setContentsMargins(0, 0, 0, 0)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.checkbox = QCheckBox("Erode/dilate")
-        self.layout().addWidget(self.checkbox)
+        layout.addWidget(self.checkbox)
 
         self.filter_cont = QFrame()
-        self.filter_cont.setLayout(QHBoxLayout())
-        self.filter_cont.layout().setContentsMargins(10, 0, 0, 0)
-        self.layout().addWidget(self.filter_cont)
+        filter_layout = QHBoxLayout(self.filter_cont)
+        filter_layout.setContentsMargins(10, 0, 0, 0)
+        layout.addWidget(self.filter_cont)
 
         self.radio_btn_cont = QFrame()
-        self.radio_btn_cont.setLayout(QVBoxLayout())
-        self.radio_btn_cont.layout().setContentsMargins(0, 0, 0, 0)
+        radio_layout = QVBoxLayout(self.radio_btn_cont)
+        radio_layout.setContentsMargins(0, 0, 0, 0)
         self.btn_group = QButtonGroup()
         self.dilate_radio = QRadioButton("Dilate")
         self.dilate_radio.setChecked(True)
         self.dilate_radio.setEnabled(False)
         self.btn_group.addButton(self.dilate_radio, 1)
-        self.radio_btn_cont.layout().addWidget(self.dilate_radio)
+        radio_layout.addWidget(self.dilate_radio)
         self.erode_radio = QRadioButton("Erode")
         self.erode_radio.setEnabled(False)
         self.btn_group.addButton(self.erode_radio, 2)
-        self.filter_cont.layout().addWidget(self.radio_btn_cont)
-        self.radio_btn_cont.layout().addWidget(self.erode_radio)
+        filter_layout.addWidget(self.radio_btn_cont)
+        radio_layout.addWidget(self.erode_radio)
 
         self.ksize_cont = QFrame()
-        self.ksize_cont.setLayout(QVBoxLayout())
-        self.ksize_cont.layout().setContentsMargins(0, 0, 0, 0)
+        ksize_layout = QVBoxLayout(self.ksize_cont)
+        ksize_layout.setContentsMargins(0, 0, 0, 0)
         self.ksize_label = QLabel("Ksize")
-        self.ksize_cont.layout().addWidget(self.ksize_label)
+        ksize_layout.addWidget(self.ksize_label)
         self.ksize_spinbox = QSpinBox()
         self.ksize_spinbox.setEnabled(False)
         self.ksize_spinbox.setMinimum(1)
         self.ksize_spinbox.setMaximum(40)
         self.ksize_spinbox.setValue(2)
-        self.ksize_cont.layout().addWidget(self.ksize_spinbox)
-        self.filter_cont.layout().addWidget(self.ksize_cont)
+        ksize_layout.addWidget(self.ksize_spinbox)
+        filter_layout.addWidget(self.ksize_cont)
 
         self.iter_cont = QFrame()
-        self.iter_cont.setLayout(QVBoxLayout())
-        self.iter_cont.layout().setContentsMargins(0, 0, 0, 0)
+        iter_layout = QVBoxLayout(self.iter_cont)
+        iter_layout.setContentsMargins(0, 0, 0, 0)
         self.iter_label = QLabel("Iteration")
-        self.iter_cont.layout().addWidget(self.iter_label)
+        iter_layout.addWidget(self.iter_label)
         self.iter_spinbox = QSpinBox()
         self.iter_spinbox.setEnabled(False)
         self.iter_spinbox.setMinimum(1)
         self.iter_spinbox.setMaximum(40)
         self.iter_spinbox.setValue(1)
-        self.iter_cont.layout().addWidget(self.iter_spinbox)
-        self.filter_cont.layout().addWidget(self.iter_cont)
+        iter_layout.addWidget(self.iter_spinbox)
+        filter_layout.addWidget(self.iter_cont)
 
         self.checkbox.toggled.connect(self._on_checkbox_toggled)
         self.btn_group.buttonClicked.connect(self._on_radio_btn_clicked)
         self.ksize_spinbox.valueChanged.connect(self._on_ksize_changed)
         self.iter_spinbox.valueChanged.connect(self._on_iter_changed)
 
+        self._mode = self.btn_group.checkedId()  # 1 dilate, 2 erode
+        self._ksize = self.ksize_spinbox.value()
+        self._iterations = self.iter_spinbox.value()
+
     @Slot(bool)
     def _on_checkbox_toggled(self, checked: bool):
+        # Enabled follows the checkbox, reset() turns it off together with the controls without unchecking it
+        self._enabled = checked
         self.dilate_radio.setEnabled(checked)
         self.erode_radio.setEnabled(checked)
         self.ksize_spinbox.setEnabled(checked)
@@ -354,14 +372,17 @@ class DilationErosionFilterWidget(BaseFilterWidget):
 
     @Slot()
     def _on_radio_btn_clicked(self):
+        self._mode = self.btn_group.checkedId()
         self.paramsChanged.emit()
 
-    @Slot()
-    def _on_ksize_changed(self):
+    @Slot(int)
+    def _on_ksize_changed(self, value: int):
+        self._ksize = value
         self.paramsChanged.emit()
 
-    @Slot()
-    def _on_iter_changed(self):
+    @Slot(int)
+    def _on_iter_changed(self, value: int):
+        self._iterations = value
         self.paramsChanged.emit()
 
     def get_checked_radio_btn_id(self) -> int:
@@ -371,24 +392,17 @@ class DilationErosionFilterWidget(BaseFilterWidget):
             return self.btn_group.id(checked_btn)
         return -1
 
-    def get_params(self) -> dict:
-        return {
-            "enabled": self.dilate_radio.isEnabled() and self.erode_radio.isEnabled(),
-            "checked_btn": self.get_checked_radio_btn_id(),
-            "k_tuple": (self.ksize_spinbox.value(), self.ksize_spinbox.value()),
-            "iter": self.iter_spinbox.value()
-        }
-
-    def apply(self, img: np.ndarray) -> np.ndarray:
-        params = self.get_params()
-        if params["enabled"]:
-            if params["checked_btn"] == 1:
-                return dilate(img, params["k_tuple"], params["iter"])
-            elif params["checked_btn"] == 2:
-                return erode(img, params["k_tuple"], params["iter"])
-        return img
+    def get_op(self) -> tuple[str, dict] | None:
+        if self._ksize == 1:
+            return None  # 1x1 structuring element leaves the image as is
+        if self._mode == 1:
+            return "dilate", {"kernel": (self._ksize, self._ksize), "iterations": self._iterations}
+        elif self._mode == 2:
+            return "erode", {"kernel": (self._ksize, self._ksize), "iterations": self._iterations}
+        return None
 
     def reset(self):
+        self._enabled = False
         self.dilate_radio.setEnabled(False)
         self.erode_radio.setEnabled(False)
         self.ksize_spinbox.setEnabled(False)
@@ -403,17 +417,65 @@ class DilationErosionFilterWidget(BaseFilterWidget):
 class EditorContainer(QFrame):
     """Main container that manages all filter widgets"""
 
+    # Longer side of the image the interactive preview is filtered at, OCR always uses full resolution
+    PREVIEW_MAX_SIDE = 1600
+    # Finished preview images kept per image, each one is at most PREVIEW_MAX_SIDE squared
+    QIMAGE_CACHE_SIZE = 16
+    # Parameters unchanged this long (ms) after a preview replace it with the full resolution result
+    REFINE_DELAY = 300
+    # Full resolution stage results kept for refines, about one per filter of the current chain
+    FULL_STAGE_CACHE_SIZE = 6
+
     def __init__(self, image_store: ImageStore, ocr_store: OCRStore):
         super().__init__()
-        self.setLayout(QVBoxLayout())
-        self.layout().setSpacing(20)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(20)
 
         self.image_store = image_store
         self.original_cv_img = None  # OpenCV version of original image
+        self.preview_cv_img = None  # original downscaled to PREVIEW_MAX_SIDE, input of the preview
+        self._original_gray = None  # (original, grayscale version of it), see get_original_gray()
 
         self.ocr_store = ocr_store
         self.ocr_store.text = None
 
+        # Preview pipeline, kept across parameter changes so its stage cache (about one entry
+        # per filter) is reused
+        self.pipeline = processor.Pipeline(cache_size=8)
+
+        # Coalesce bursts of parameter changes (slider drags) so only the latest set is processed
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(40)
+        self._debounce.timeout.connect(self._do_pipeline)
+
+        # Filters run in a worker, one run at a time since they share the pipeline's scratch buffers.
+        # Results from an older generation (e.g. previous image) are dropped.
+        self._pipeline_gen = 0
+        self._pipeline_busy = False
+        self._pipeline_dirty = False  # parameters changed while a run was in flight
+
+        # Finished preview images of the current image by ops, so revisiting a setting needs no run
+        self._qimg_cache: OrderedDict[tuple, tuple[QImage, np.ndarray]] = OrderedDict()
+
+        # Once parameters settle, the same ops run on the full resolution original (own pipeline, one
+        # run at a time). The latest result is kept as (ops key, QImage, ndarray), OCR reuses it.
+        # Its stage cache lets a refine after tweaking the last filter resume from the earlier ones.
+        # Zoomed in refines filter varying tiles, they get a pipeline of their own so they don't evict it.
+        self.full_pipeline = processor.Pipeline(cache_size=self.FULL_STAGE_CACHE_SIZE)
+        self.tile_pipeline = processor.Pipeline()
+        self._refine_timer = QTimer(self)
+        self._refine_timer.setSingleShot(True)
+        self._refine_timer.setInterval(self.REFINE_DELAY)
+        self._refine_timer.timeout.connect(self._do_refine)
+        self._refine_busy = False
+        self._full_result = None
+
+        # Optional callable returning the visible part of the edited image as fractions, or None when
+        # all of it is visible (e.g. ImageViewer.visible_fraction). Zoomed in, refine only filters that.
+        self.viewport_provider = None
+        self._refine_rect = None  # fractions the last refine run covered, None for the whole image
+
         # List of all filters (order matters - they're applied sequentially)
         self.filters = [
             GrayscaleFilterWidget(),
@@ -426,20 +488,20 @@ class EditorContainer(QFrame):
 
         # Add all filters to layout
         for filter_widget in self.filters:
-            self.layout().addWidget(filter_widget)
+            layout.addWidget(filter_widget)
             filter_widget.paramsChanged.connect(self.on_params_changed)
 
         # Button to run OCR
         self.run_ocr_btn = QPushButton("Run OCR")
-        self.layout().addWidget(self.run_ocr_btn)
+        layout.addWidget(self.run_ocr_btn)
         self.run_ocr_btn.clicked.connect(self._ocr_worker)
 
         # Vertical spacer to push filters to top
         v_spacer = QSpacerItem(0, 0, QSizePolicy.Minimum, QSizePolicy.Expanding)
-        self.layout().addItem(v_spacer)
+        layout.addItem(v_spacer)
 
-        # set up threadpool to run ocr in separate thread
-        self.threadpool = QThreadPool()
+        # shared threadpool to run ocr in separate thread (sized at app startup)
+        self.threadpool = QThreadPool.globalInstance()
 
         # Connect to original image changes
         self.image_store.imageChanged.connect(self.on_original_image_changed)
@@ -447,27 +509,232 @@ class EditorContainer(QFrame):
     def on_original_image_changed(self, qimg: QImage, path: str):
         """Store the original image when it changes"""
         self.original_cv_img = qimage_to_cv(qimg)
-        # Reset all filters
+        self.preview_cv_img = None
+        if self.original_cv_img is not None:
+            self.preview_cv_img = processor.fit_within(self.original_cv_img, self.PREVIEW_MAX_SIDE)
+        self._original_gray = None
+        self._qimg_cache.clear()
+        self._full_result = None
+        self._refine_rect = None
+        self._refine_timer.stop()
+        # Reset all filters, edited image is set to the original right below so nothing to process
         self.reset_all_filters()
+        self._debounce.stop()
+        self._pipeline_gen += 1
+        self._pipeline_dirty = False
+        if not self._pipeline_busy:
+            # Free the previous image's buffers now (a running worker still uses them, they get evicted later)
+            self.pipeline.release()
+        if not self._refine_busy:
+            self.full_pipeline.release()
+            self.tile_pipeline.release()
         # Initialize edited image with original
         self.image_store.set_edited_img(qimg)
 
     @Slot()
     def on_params_changed(self):
-        """Handle parameter changes and apply all filters in sequence"""
-        if self.original_cv_img is None:
+        """Handle parameter changes, (re)starts the timer so the latest change always wins"""
+        if not any(fw.is_enabled() for fw in self.filters):
+            # Everything off just shows the original, nothing worth debouncing
+            self._debounce.stop()
+            self._do_pipeline()
             return
+        self._debounce.start()
 
-        # Start with a copy of the original image
-        processed = self.original_cv_img.copy()
+    @Slot()
+    def _do_pipeline(self):
+        """Snapshot filter parameters and apply all filters to the preview image in a worker"""
+        if self.preview_cv_img is None:
+            return
 
-        # Apply all filters in sequence
-        for filter_widget in self.filters:
-            processed = filter_widget.apply(processed)
+        self._refine_timer.stop()
+        ops = self.get_ops()
 
-        # Convert back to QImage and update store once at the end
-        qimg = cv_to_qimage(processed)
-        self.image_store.set_edited_img(qimg)
+        # Cheap outcomes are served right away, even while a run is in flight (its result gets dropped)
+        if not ops:
+            # Nothing to apply, show the already converted original instead of round-tripping it
+            self._pipeline_gen += 1
+            self._pipeline_dirty = False
+            self._publish_edited(self.image_store.get_original_img())
+            return
+
+        key = processor.ops_key(ops)
+        cached = self._qimg_cache.get(key)
+        if cached is not None:
+            self._pipeline_gen += 1
+            self._pipeline_dirty = False
+            self._qimg_cache.move_to_end(key)
+            self._publish_edited(cached[0])
+            self._schedule_refine()
+            return
+
+        if self._pipeline_busy:
+            self._pipeline_dirty = True
+            return
+
+        self._pipeline_gen += 1
+        self._pipeline_busy = True
+        worker = Worker(self._run_pipeline, ops, self.preview_cv_img, self._pipeline_gen)
+        worker.signals.result.connect(self._on_pipeline_result)
+        worker.signals.completed.connect(self._on_pipeline_completed)
+        self.threadpool.start(worker)
+
+    def _run_pipeline(self, ops: list[tuple[str, dict]], original: np.ndarray,
+                      gen: int) -> tuple[int, tuple, QImage, np.ndarray]:
+        """Run filter ops on the original image (worker thread), returns generation, ops key and result"""
+        key = processor.ops_key(ops)
+        processed = original
+        if ops and ops[0][0] in ("gray", "threshold"):
+            # Grayscale first (explicit, or the one binarization needs) only depends on the original,
+            # so reuse its cached result. Pipeline sees a 2D input and won't convert again.
+            processed = self.get_original_gray(original)
+            if ops[0][0] == "gray":
+                ops = ops[1:]
+
+        # Pipeline fuses what it can and never modifies its input. With its stage cache on, the result
+        # is a cached array (or the cached gray) that is never written again, so the QImage can wrap
+        # it without a copy. It keeps the array alive even after the cache evicts it.
+        self.pipeline.ops = ops
+        processed = self.pipeline.execute(processed)
+        return gen, key, ndarray_to_qimage(processed), processed
+
+    @Slot(object)
+    def _on_pipeline_result(self, result: tuple[int, tuple, QImage, np.ndarray]):
+        """Publish the filtered image unless parameters or image changed since the run started"""
+        gen, key, qimg, processed = result
+        if gen == self._pipeline_gen:
+            self._qimg_cache[key] = (qimg, processed)
+            while len(self._qimg_cache) > self.QIMAGE_CACHE_SIZE:
+                self._qimg_cache.popitem(last=False)
+            self._publish_edited(qimg)
+            self._schedule_refine()
+
+    def _schedule_refine(self):
+        """Start the countdown to a full resolution run, if the preview is actually downscaled"""
+        if self.preview_cv_img is not self.original_cv_img:
+            self._refine_timer.start()
+
+    @Slot()
+    def _do_refine(self):
+        """Run current ops on the full resolution original in a worker (or reuse the last such run)"""
+        if self._refine_busy:
+            self._refine_timer.start()
+            return
+        ops = self.get_ops()
+        if not ops:
+            return
+        key = processor.ops_key(ops)
+        if self._full_result is not None and self._full_result[0] == key:
+            self._publish_edited(self._full_result[1])
+            return
+
+        # Zoomed in on a small part, only that part (plus filter halo) is worth full resolution
+        fraction = self.viewport_provider() if self.viewport_provider is not None else None
+        preview = self._qimg_cache.get(key)
+        self._refine_busy = True
+        if fraction is not None and preview is not None and \
+                (fraction[2] - fraction[0]) * (fraction[3] - fraction[1]) < 0.5:
+            self._refine_rect = fraction
+            # The tile is drawn over the preview, make sure that's what is shown
+            self._publish_edited(preview[0])
+            worker = Worker(self._run_full_tile, ops, self.original_cv_img, fraction, self._pipeline_gen)
+            worker.signals.result.connect(self._on_tile_result)
+        else:
+            self._refine_rect = None
+            worker = Worker(self._run_full, ops, self.original_cv_img, self._pipeline_gen)
+            worker.signals.result.connect(self._on_full_result)
+        worker.signals.completed.connect(self._on_refine_completed)
+        self.threadpool.start(worker)
+
+    @Slot()
+    def on_view_changed(self):
+        """Re-refine when the edited view was zoomed/panned away from the region refined last"""
+        if self._refine_timer.isActive():
+            return  # refine pending anyway
+        ops = self.get_ops()
+        if not ops:
+            return
+        if self._full_result is not None and self._full_result[0] == processor.ops_key(ops):
+            return  # the whole image is already at full resolution with these filters
+        fraction = self.viewport_provider() if self.viewport_provider is not None else None
+        if fraction is None or self._refine_rect is None:
+            moved = fraction is not self._refine_rect
+        else:
+            # Swapping preview for refined image may shift the rounded view by a pixel, that's not a move
+            moved = max(abs(a - b) for a, b in zip(fraction, self._refine_rect)) > 0.01
+        if moved:
+            self._refine_timer.start()
+
+    def _run_full(self, ops: list[tuple[str, dict]], original: np.ndarray,
+                  gen: int) -> tuple[int, tuple, QImage, np.ndarray]:
+        """Run filter ops on the full resolution original (worker thread)"""
+        self.full_pipeline.ops = ops
+        # With the stage cache on the result is a cached array that is never written again, so OCR may
+        # use it while the next run is going and the QImage can share it
+        processed = self.full_pipeline.execute(original)
+        return gen, processor.ops_key(ops), ndarray_to_qimage(processed), processed
+
+    def _run_full_tile(self, ops: list[tuple[str, dict]], original: np.ndarray,
+                       fraction: tuple[float, float, float, float],
+                       gen: int) -> tuple[int, QImage, tuple[float, float, float, float]]:
+        """Full resolution ops on the visible region only (worker thread), returns it with its place in the image"""
+        h, w = original.shape[:2]
+        x0, y0 = int(fraction[0] * w), int(fraction[1] * h)
+        x1, y1 = min(w, int(np.ceil(fraction[2] * w))), min(h, int(np.ceil(fraction[3] * h)))
+        halo = processor.ops_halo(ops)
+        px0, py0 = max(0, x0 - halo), max(0, y0 - halo)
+        px1, py1 = min(w, x1 + halo), min(h, y1 + halo)
+
+        self.tile_pipeline.ops = ops
+        tile = self.tile_pipeline.execute(original[py0:py1, px0:px1])
+        # Copied out of the pipeline's scratch buffers, without the halo
+        visible = tile[y0 - py0:y1 - py0, x0 - px0:x1 - px0].copy()
+        return gen, ndarray_to_qimage(visible), (x0 / w, y0 / h, x1 / w, y1 / h)
+
+    @Slot(object)
+    def _on_tile_result(self, result: tuple[int, QImage, tuple[float, float, float, float]]):
+        """Show the refined visible region over the preview unless anything changed since the run started"""
+        gen, qimg, fraction = result
+        if gen == self._pipeline_gen:
+            self.image_store.set_edited_tile(qimg, fraction)
+
+    @Slot(object)
+    def _on_full_result(self, result: tuple[int, tuple, QImage, np.ndarray]):
+        """Swap the preview for the full resolution image unless anything changed since the run started"""
+        gen, key, qimg, processed = result
+        if gen == self._pipeline_gen:
+            self._full_result = (key, qimg, processed)
+            self._publish_edited(qimg)
+
+    @Slot()
+    def _on_refine_completed(self):
+        self._refine_busy = False
+
+    def _publish_edited(self, qimg: QImage):
+        """Set the edited image, unless that exact image is already shown (saves the viewer a rescale)"""
+        if qimg is not self.image_store.get_edited_img():
+            self.image_store.set_edited_img(qimg)
+
+    @Slot()
+    def _on_pipeline_completed(self):
+        """Start another run if parameters changed while this one was in flight"""
+        self._pipeline_busy = False
+        if self._pipeline_dirty:
+            self._pipeline_dirty = False
+            self._do_pipeline()
+
+    def get_ops(self) -> list[tuple[str, dict]]:
+        """Snapshot enabled filters as pipeline ops, in application order"""
+        # Widgets are only read here on the GUI thread, workers get plain data.
+        # Disabled filters are skipped before any of their params are read.
+        return [op for op in (fw.get_op() for fw in self.filters if fw.is_enabled()) if op is not None]
+
+    def get_original_gray(self, original: np.ndarray) -> np.ndarray:
+        """Return grayscale version of the original image, converted once per image (safe from workers)"""
+        cached = self._original_gray
+        if cached is None or cached[0] is not original:
+            cached = self._original_gray = (original, processor.to_gray(original))
+        return cached[1]
 
     def reset_all_filters(self):
         """Reset all filters to default values"""
@@ -480,26 +747,39 @@ class EditorContainer(QFrame):
     @Slot()
     def _ocr_worker(self):
         """worker method to call and run ocr process in another thread"""
-        # Set wait cursor on main thread
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-
-        worker = Worker(self.run_ocr)
+        ops, image = self.get_ops(), self.original_cv_img
+        if self._full_result is not None and self._full_result[0] == processor.ops_key(ops):
+            # Full resolution result of these exact filters is already there
+            ops, image = [], self._full_result[2]
+        worker = Worker(self.run_ocr, ops, image)
+        worker.signals.started.connect(self._on_ocr_started)
         worker.signals.result.connect(self._on_ocr_successful)
         worker.signals.error.connect(self._on_ocr_error)
         worker.signals.completed.connect(self._on_ocr_completed)
         self.threadpool.start(worker)
 
-    def run_ocr(self) -> str | None:
-        """Run the OCR on img"""
-        edited_img = self.image_store.get_edited_img()
-        cv_img = qimage_to_cv(edited_img)
-        text = orc_tesseract(cv_img, lang="eng")
-        return text
+    def run_ocr(self, ops: list[tuple[str, dict]], original: np.ndarray) -> str | None:
+        """Filter the full resolution original and run the OCR on it"""
+        if original is None:
+            return None
+        # Imported on first use, pytesseract isn't needed to bring the window up
+        from backend.ocr_engine import orc_tesseract_text
+
+        # Own pipeline, the preview one may be running concurrently on its scratch buffers.
+        # One-off full resolution run: on the GPU if possible, else band by band instead of image by image.
+        cv_img = processor.Pipeline(ops).execute_large(original)
+        return orc_tesseract_text(cv_img, lang="eng")
+
+    @Slot()
+    def _on_ocr_started(self):
+        """Show wait cursor once OCR actually runs (called on main thread)"""
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
 
     @Slot()
-    def _on_ocr_successful(self, text: str):
+    def _on_ocr_successful(self, text: str | None):
         """Set the result text to textarea if ocr is completed"""
-        self.ocr_store.set_text(text)
+        if text is not None:
+            self.ocr_store.set_text(text)
 
     @Slot()
     def _on_ocr_error(self, error: tuple):
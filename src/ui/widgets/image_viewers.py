@@ -1,10 +1,17 @@
-from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtGui import QPixmap, QPixmapCache, QImage, QImageReader
 from PySide6.QtWidgets import QFrame, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QSpacerItem, QSizePolicy
-from PySide6.QtCore import QEvent, Slot, Qt
+from PySide6.QtCore import QEvent, Slot, Qt, QThreadPool
 
-from ui.models.image_store import ImageStore
+from ui.models.image_store import ImageStore, build_mipmaps
 from ui.widgets.custom_image_viewer import ImageViewer
-from utils.file_utils import open_file_dialog
+from utils.file_utils import open_file_dialog, is_image_file, IMAGE_EXTENSIONS
+from utils.worker_manager import Worker
+
+
+def _read_image(file_path: str, gen: int) -> tuple[int, str, QImage, list[QImage]]:
+    """Decodes an image file and builds its mipmaps (safe from worker threads, unlike QPixmap)"""
+    qimage = QImageReader(file_path).read()
+    return gen, file_path, qimage, build_mipmaps(qimage)
 
 
 class OriginalImageViewer(QFrame):
@@ -14,6 +21,7 @@ class OriginalImageViewer(QFrame):
         self.layout().setContentsMargins(0, 0, 0, 0)
         
         self.image_store = image_store
+        self._load_gen = 0  # only the most recently requested file gets published
         
         # Listen to image store changes
         self.image_store.imageChanged.connect(self.on_image_changed)
@@ -23,6 +31,7 @@ class OriginalImageViewer(QFrame):
         
         # Image viewer
         self.image_viewer = ImageViewer(self)
+        self.image_viewer.mip_provider = self.image_store.best_mip
         self.layout().addWidget(self.image_viewer)
         
         # Enable drag and drop
@@ -61,29 +70,33 @@ class OriginalImageViewer(QFrame):
         file_path = open_file_dialog(
             parent=self,
             caption="Choose Image",
-            filter_str="Image Files (*.png *.jpg *.jpeg *.bmp *.gif *.tiff)"
+            filter_str=f"Image Files ({' '.join('*' + ext for ext in sorted(IMAGE_EXTENSIONS))})"
         )
         
         if file_path:
             self._load_image(file_path)
     
     def _load_image(self, file_path: str):
-        """Load image from file and publish to store."""
-        pixmap = QPixmap(file_path)
-        if not pixmap.isNull():
-            # Display in viewer
-            self.image_viewer.load_pixmap(pixmap)
-            
-            # Publish to store (so other widgets can see it)
-            qimage = pixmap.toImage()
-            self.image_store.set_original_img(qimage, file_path)
-            self.image_store.set_edited_img(qimage)
+        """Decode image file in a worker, published to store once done."""
+        # Full resolution is kept (no scaled decode), OCR needs every pixel of the original
+        self._load_gen += 1
+        worker = Worker(_read_image, file_path, self._load_gen)
+        worker.signals.result.connect(self._on_image_loaded)
+        QThreadPool.globalInstance().start(worker)
+    
+    @Slot(object)
+    def _on_image_loaded(self, result: tuple[int, str, QImage, list[QImage]]):
+        """Publish decoded image to store (so other widgets can see it), viewer gets it back via imageChanged."""
+        gen, file_path, qimage, mipmaps = result
+        if gen != self._load_gen or qimage.isNull():
+            return
+        self.image_store.set_original_img(qimage, file_path, mipmaps)
     
     @Slot(QImage, str)
     def on_image_changed(self, qimg: QImage, path: str):
         """Handle image change from store."""
-        pixmap = QPixmap.fromImage(qimg)
-        self.image_viewer.load_pixmap(pixmap)
+        # Store holds the mipmaps of this image, the viewer only converts the levels it shows
+        self.image_viewer.load_pixmap(qimg)
     
     # ========================================================================
     # Drag and Drop
@@ -102,7 +115,7 @@ class OriginalImageViewer(QFrame):
                 if urls and event.mimeData().hasUrls():
                     file_path = urls[0].toLocalFile()
                     # Validate it's an image
-                    if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff')):
+                    if is_image_file(file_path):
                         self._load_image(file_path)
                         event.acceptProposedAction()
                         return True
@@ -121,9 +134,14 @@ class EditedImageViewer(QFrame):
 
         # Store original pixmap for scaling
         self.original_pixmap = None
+        self._last_cache_key = 0  # cacheKey of the QImage currently shown
 
         # when edited image changes anywhere, show it here as the right panel
         self.image_store.editedImageChanged.connect(self.show_image)
+        self.image_store.editedTileChanged.connect(self.show_tile)
+        # a new original resets zoom/pan, edits of the same one keep the view. Checked against the
+        # store when an edited image arrives, so it doesn't matter which imageChanged slot runs first.
+        self._view_original_key = None  # cacheKey of the original the current view belongs to
 
         # Image viewer widget
         self.image_viewer = ImageViewer()
@@ -133,5 +151,41 @@ class EditedImageViewer(QFrame):
     def show_image(self, qimg: QImage):
         """Set image on the custom image viewer."""
         if qimg is not None and not qimg.isNull():
-            self.original_pixmap = QPixmap.fromImage(qimg)
-            self.image_viewer.load_pixmap(self.original_pixmap)
+            original_key = self.image_store.get_original_img().cacheKey()
+            new_image = original_key != self._view_original_key
+            if qimg.cacheKey() == self._last_cache_key and not new_image:
+                # Same image emitted again (e.g. a filter toggled off and back on), already shown
+                return
+            self._last_cache_key = qimg.cacheKey()
+            previous = self.original_pixmap
+            if qimg.cacheKey() == original_key:
+                # Unfiltered original: reuse the store's mipmap pyramid (and its converted levels)
+                self.original_pixmap = self.image_store.get_original_img()
+                self.image_viewer.mip_provider = self.image_store.best_mip
+            else:
+                # Filter previews revisit the same QImages (see EditorContainer), convert each once
+                cache_key = f"edited_{qimg.cacheKey()}"
+                pixmap = QPixmapCache.find(cache_key)
+                if not pixmap or pixmap.isNull():
+                    pixmap = QPixmap.fromImage(qimg)
+                    QPixmapCache.insert(cache_key, pixmap)
+                self.original_pixmap = pixmap
+                self.image_viewer.mip_provider = None
+            if not new_image and previous is not None and self._same_aspect(previous, self.original_pixmap):
+                # Filtered version of the shown image (preview or full size), keep the view and
+                # render fast while edits keep coming
+                self.image_viewer.update_pixmap(self.original_pixmap)
+            else:
+                self._view_original_key = original_key
+                self.image_viewer.load_pixmap(self.original_pixmap)
+
+    @Slot(QImage, object)
+    def show_tile(self, qimg: QImage, fraction: tuple[float, float, float, float]):
+        """Draw a sharper version of a region over the shown image, until that image changes."""
+        if qimg is not None and not qimg.isNull():
+            self.image_viewer.set_overlay(QPixmap.fromImage(qimg), fraction)
+
+    @staticmethod
+    def _same_aspect(a: QPixmap | QImage, b: QPixmap | QImage) -> bool:
+        """Whether two pixmaps show the same frame, allowing for the preview's rounding"""
+        return abs(a.width() / a.height() - b.width() / b.height()) < 0.01
@@ -1,16 +1,31 @@
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 from PySide6.QtWidgets import QFileDialog, QErrorMessage
 
 
-def resource_path(rel: str | Path) -> Path:
-    """Return absolute path to a bundled resource (PyInstaller) or project file (dev)."""
+# Image file types the app opens (file dialog filter and drag and drop)
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff"})
+
+
+def is_image_file(file_path: str) -> bool:
+    """Whether the path has one of the supported image extensions (case insensitive)."""
+    return Path(file_path).suffix.lower() in IMAGE_EXTENSIONS
+
+
+@lru_cache(maxsize=1)
+def _resource_base() -> Path:
+    """Directory resources are relative to, it doesn't change while running."""
     if getattr(sys, "frozen", False):  # running as PyInstaller bundle
-        base = Path(sys._MEIPASS)  # type: ignore[attr-defined]
-    else:
-        base = Path(__file__).resolve().parent.parent.parent
-    return (base / rel).resolve()
+        return Path(sys._MEIPASS)  # type: ignore[attr-defined]
+    return Path(__file__).resolve().parent.parent.parent
+
+
+@lru_cache(maxsize=128)
+def resource_path(rel: str | Path) -> Path:
+    """Return absolute path to a bundled resource (PyInstaller) or project file (dev), resolved once per path."""
+    return (_resource_base() / rel).resolve()
 
 
 def open_file_dialog(parent=None, caption="Open File", directory="", filter_str="All Files (*)",
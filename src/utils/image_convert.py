@@ -1,34 +1,70 @@
+import sys
+
+import cv2
 import numpy as np
 from PySide6.QtGui import QImage
 
 
-def qimage_to_cv(qimg: QImage) -> np.ndarray:
-    if qimg is None or qimg.isNull():
-        return None
-    qimg = qimg.convertToFormat(QImage.Format.Format_RGBA8888)
+def qimage_to_ndarray(qimg: QImage) -> np.ndarray:
+    """
+    Returns a numpy view on the QImage pixels without copying (row padding is sliced off).
+
+    The view is only valid while qimg is alive and unmodified. 8-bit formats give (h, w) array,
+    32-bit ones (h, w, 4), 24-bit ones (h, w, 3) - in the QImage's own channel order.
+    """
     w, h = qimg.width(), qimg.height()
-    ptr = qimg.bits()
-    
+    channels = qimg.depth() // 8
+    ptr = qimg.constBits()
+
     # Handle both old sip.voidptr and new memoryview
     if hasattr(ptr, 'setsize'):
         ptr.setsize(qimg.sizeInBytes())
-        arr = np.frombuffer(ptr, np.uint8).reshape((h, w, 4))
-    else:
-        # memoryview (newer PySide6)
-        arr = np.array(ptr).reshape((h, w, 4))
-    
-    # RGBA -> BGR
-    bgr = arr[..., :3][:, :, ::-1].copy()
-    return bgr
+    rows = np.frombuffer(ptr, np.uint8, count=qimg.sizeInBytes()).reshape((h, qimg.bytesPerLine()))
+    arr = rows[:, :w * channels]
+    return arr if channels == 1 else arr.reshape((h, w, channels))
+
+
+def ndarray_to_qimage(arr: np.ndarray) -> QImage:
+    """
+    Wraps a uint8 grayscale or BGR array as QImage without copying.
+
+    The QImage keeps a reference to the array, but Qt copies of it (e.g. passed through a signal)
+    don't - call .copy() on the result before handing it out.
+    """
+    arr = np.ascontiguousarray(arr)
+    h, w = arr.shape[:2]
+    fmt = QImage.Format.Format_Grayscale8 if arr.ndim == 2 else QImage.Format.Format_BGR888
+    q = QImage(arr.data, w, h, arr.strides[0], fmt)
+    q._ndarray_ref = arr  # keep the buffer alive as long as this QImage object
+    return q
+
+
+# 32-bit formats that are stored as B, G, R, A/X bytes in memory on little-endian machines
+_BGRX_FORMATS = (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32)
+
+
+def qimage_to_cv(qimg: QImage) -> np.ndarray:
+    if qimg is None or qimg.isNull():
+        return None
+
+    # Formats whose bytes already map onto BGR are read straight out of the QImage buffer, anything
+    # else goes through one Qt conversion first. Channel drops/swaps are a single vectorized cvtColor
+    # pass that also produces the only (contiguous) pixel copy.
+    fmt = qimg.format()
+    if fmt in _BGRX_FORMATS and sys.byteorder == "little":
+        return cv2.cvtColor(qimage_to_ndarray(qimg), cv2.COLOR_BGRA2BGR)
+    if fmt == QImage.Format.Format_BGR888:
+        return qimage_to_ndarray(qimg).copy()
+    if fmt == QImage.Format.Format_RGB888:
+        return cv2.cvtColor(qimage_to_ndarray(qimg), cv2.COLOR_RGB2BGR)
+    if fmt == QImage.Format.Format_Grayscale8:
+        # Grayscale scans are common, expand them directly instead of via RGBA
+        return cv2.cvtColor(qimage_to_ndarray(qimg), cv2.COLOR_GRAY2BGR)
+
+    qimg = qimg.convertToFormat(QImage.Format.Format_RGBA8888)
+    return cv2.cvtColor(qimage_to_ndarray(qimg), cv2.COLOR_RGBA2BGR)
 
 
 def cv_to_qimage(img: np.ndarray) -> QImage:
-    if img.ndim == 2:
-        h, w = img.shape
-        rgba = np.stack([img, img, img, np.full((h, w), 255, np.uint8)], axis=2)
-    else:
-        # BGR -> RGBA
-        rgba = np.concatenate([img[:, :, ::-1], 255*np.ones((*img.shape[:2], 1), np.uint8)], axis=2)
-    h, w = rgba.shape[:2]
-    q = QImage(rgba.data, w, h, w*4, QImage.Format.Format_RGBA8888)
-    return q.copy()
+    # Qt reads grayscale/BGR data directly, one copy detaches the result from the numpy buffer
+    return ndarray_to_qimage(img).copy()
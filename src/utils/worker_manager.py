@@ -5,6 +5,7 @@ from PySide6.QtCore import QObject, Signal, Slot, QRunnable
 
 
 class WorkerSignals(QObject):
+    started = Signal()
     completed = Signal()
     error = Signal(tuple)
     result = Signal(object)
@@ -20,6 +21,8 @@ class Worker(QRunnable):
 
     @Slot()
     def run(self):
+        # GUI reactions (e.g. a busy cursor) belong in slots, which run on the main thread
+        self.signals.started.emit()
         try:
             result = self.func(*self.args, **self.kwargs)
         except Exception:
@@ -4,8 +4,9 @@ from pathlib import Path
 import cv2
 import numpy as np
 import pytesseract
-from PIL import Image
 from numpy.ma.extras import median
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QApplication, QLabel
 from pytesseract import Output
 
 from src.backend.processor import auto_deskew, to_gray, to_binary, invert, dilate, remove_borders, gaussian_blur
@@ -37,4 +38,11 @@ if __name__ == '__main__':
 
     data = pytesseract.image_to_data(thresh, lang="eng", config="--psm 3", output_type=Output.DICT)
     print(data)
-    Image.fromarray(thresh).show()
+
+    # Show the result straight from the numpy buffer, no temp file or external viewer
+    app = QApplication(sys.argv)
+    qimg = QImage(thresh.data, thresh.shape[1], thresh.shape[0], thresh.strides[0], QImage.Format.Format_Grayscale8)
+    label = QLabel()
+    label.setPixmap(QPixmap.fromImage(qimg))
+    label.show()
+    app.exec()
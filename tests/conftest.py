@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other as top-level packages (backend, ui, utils), as when run from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+
+from backend import processor
+from ui.models.image_store import ImageStore
+from ui.models.ocr_store import OCRStore
+from ui.widgets.editor_panel import EditorContainer
+from utils.image_convert import qimage_to_ndarray
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+OPS = [("gray", {}), ("gaussian", {"kernel_size": (5, 5)}), ("threshold", {"threshold": 128, "max_value": 255}),
+       ("dilate", {"kernel": (3, 3), "iterations": 2})]
+
+
+@pytest.fixture
+def editor():
+    app = QApplication.instance() or QApplication([])
+    container = EditorContainer(ImageStore(), OCRStore())
+    yield container
+    container.deleteLater()
+    app.processEvents()
+
+
+def test_tile_refine_matches_full_resolution_result(editor):
+    image = cv2.imread(str(DATA / "index_02.JPG"))
+    h, w = image.shape[:2]
+    gen, qimg, fraction = editor._run_full_tile(OPS, image, (0.2, 0.35, 0.55, 0.6), 7)
+
+    x0, y0, x1, y1 = round(fraction[0] * w), round(fraction[1] * h), round(fraction[2] * w), round(fraction[3] * h)
+    expected = processor.Pipeline(OPS).execute(image)[y0:y1, x0:x1]
+    assert gen == 7
+    assert (qimg.width(), qimg.height()) == (x1 - x0, y1 - y0)
+    np.testing.assert_array_equal(qimage_to_ndarray(qimg), expected)
+
+
+def test_view_change_refines_again_after_filters_changed(editor):
+    editor.viewport_provider = lambda: (0.0, 0.0, 0.3, 0.3)
+    editor.filters[0].checkbox.setChecked(True)
+    ops = editor.get_ops()
+    editor._full_result = (processor.ops_key(ops), None, None)
+
+    # Whole image already refined with the current filters, zooming needs nothing new
+    editor._refine_timer.stop()
+    editor.on_view_changed()
+    assert not editor._refine_timer.isActive()
+
+    # The full resolution result is of older filters now
+    editor.filters[2].checkbox.setChecked(True)
+    editor._refine_timer.stop()
+    editor.on_view_changed()
+    assert editor._refine_timer.isActive()
+
+
+def test_binary_threshold_shows_the_value_it_applies(editor):
+    binary = editor.filters[1]
+    assert binary.get_op()[1]["threshold"] == int(binary.threshold_label.text()) == 128
+
+    binary.slider.setValue(201)
+    assert binary.get_op()[1]["threshold"] == int(binary.threshold_label.text()) == 200
@@ -0,0 +1,20 @@
+from backend.ocr_engine import ocr_data_to_text
+
+
+def _word(block, par, line, text):
+    return {"level": 5, "block_num": block, "par_num": par, "line_num": line, "text": text,
+            "left": 0, "top": 0, "width": 1, "height": 1, "conf": 90}
+
+
+def _page(*words):
+    return {key: [w[key] for w in words] for key in words[0]}
+
+
+def test_text_has_a_line_per_tesseract_line_and_blank_line_between_blocks():
+    data = _page(
+        _word(1, 0, 0, ""),
+        _word(1, 1, 1, "Two"), _word(1, 1, 1, "words"),
+        _word(1, 1, 2, "next"), _word(1, 1, 2, " "),
+        _word(2, 1, 1, "Second"), _word(2, 1, 1, "block"),
+    )
+    assert ocr_data_to_text(data) == "Two words\nnext\n\nSecond block\n"
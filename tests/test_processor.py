@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.processor import Pipeline, _rotation_matrix, get_skew_angle, rotate_image
+from backend.processor_cuda import cuda_available
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.mark.parametrize("name", ["90.png", "index_02.JPG", "page_01.jpg"])
+def test_straight_pages_are_not_deskewed(name):
+    image = cv2.imread(str(DATA / name))
+    assert get_skew_angle(image) == pytest.approx(0.0, abs=0.5)
+
+
+@pytest.mark.parametrize("angle", [-3.0, -1.5, 2.0, 4.0])
+def test_skew_is_found_within_search_step(angle):
+    image = rotate_image(cv2.imread(str(DATA / "index_02.JPG")), angle)
+    assert get_skew_angle(image) == pytest.approx(angle, abs=0.5)
+
+
+def test_blank_page_has_no_skew():
+    assert get_skew_angle(np.full((800, 600, 3), 255, np.uint8)) == 0.0
+
+
+def test_rotation_is_around_the_integer_center():
+    np.testing.assert_array_equal(_rotation_matrix(101, 60, 3.0), cv2.getRotationMatrix2D((30, 50), 3.0, 1.0))
+
+
+@pytest.mark.skipif(not cuda_available(), reason="needs OpenCV built with CUDA and a device")
+def test_gpu_rotation_matches_cpu():
+    # Odd size, so an off-by-half center would show
+    image = cv2.imread(str(DATA / "index_02.JPG"))[:801, :601]
+    h, w = image.shape[:2]
+    cpu = cv2.warpAffine(image, _rotation_matrix(h, w, 2.5), (w, h), flags=cv2.INTER_CUBIC,
+                         borderMode=cv2.BORDER_REPLICATE)
+    np.testing.assert_allclose(rotate_image(image, 2.5).astype(np.int16), cpu.astype(np.int16), atol=2)
+
+
+OPS = [("gray", {}), ("gaussian", {"kernel_size": (3, 3)}), ("threshold", {"threshold": 127, "max_value": 255}),
+       ("invert", {}), ("median", {"kernel_size": 3}), ("dilate", {"kernel": (2, 2), "iterations": 1})]
+
+
+def test_cached_pipeline_matches_uncached():
+    image = cv2.imread(str(DATA / "90.png"))
+    expected = Pipeline(OPS).execute(image).copy()
+    cached = Pipeline(OPS, cache_size=8)
+    first = cached.execute(image)
+    np.testing.assert_array_equal(first, expected)
+
+    # Changing the last filter resumes from the cached prefix and leaves earlier results intact
+    cached.ops = OPS[:-1] + [("erode", {"kernel": (2, 2), "iterations": 1})]
+    np.testing.assert_array_equal(cached.execute(image), Pipeline(cached.ops).execute(image))
+    np.testing.assert_array_equal(first, expected)